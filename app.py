@@ -1,9 +1,9 @@
-from flask import Flask, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, request, jsonify, session, redirect, url_for
 import base64
 import hashlib
 import secrets
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity, jwt_required
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt, get_jwt_identity, jwt_required
 from datetime import datetime, timezone, timedelta
 import os
 from dotenv import load_dotenv
@@ -16,6 +16,12 @@ from werkzeug.security import generate_password_hash, check_password_hash
 import requests
 from urllib.parse import quote
 import time
+from concurrent.futures import ThreadPoolExecutor
+from token_blocklist import create_blocklist_from_env
+from reference_data import ReferenceDataCache
+from singleflight import SingleFlight
+from callback_dedup import CallbackDeduplicator
+from user_export import DEFAULT_PAGE_SIZE, clamp_page_size, iter_ndjson
 
 load_dotenv()
 
@@ -32,12 +38,35 @@ CORS(app, supports_credentials=True)
 # Initialize JWT
 jwt = JWTManager(app)
 
+# Revoked tokens, shared across workers through TOKEN_BLOCKLIST_BACKEND
+token_blocklist = create_blocklist_from_env()
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return token_blocklist.is_revoked(jwt_payload['jti'])
+
+# De-duplicates LinkedIn callbacks that arrive more than once for the same code
+linkedin_callbacks = CallbackDeduplicator(SingleFlight(
+    ttl=int(os.getenv('LINKEDIN_CALLBACK_DEDUP_TTL', 30)),
+    max_entries=int(os.getenv('LINKEDIN_CALLBACK_DEDUP_MAX', 1024))
+))
+
 # Initialize Supabase client
 supabase: Client = create_client(
     os.getenv("SUPABASE_URL"),
     os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 )
 
+# Shared pool for fanning out independent Supabase queries within a request
+query_executor = ThreadPoolExecutor(max_workers=int(os.getenv('QUERY_WORKERS', 8)))
+
+# Universities, programs and industries for onboarding, cached across requests
+reference_data = ReferenceDataCache(
+    supabase,
+    ttl=int(os.getenv('REFERENCE_DATA_TTL', 300)),
+    executor=query_executor
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
@@ -69,13 +98,27 @@ def handle_auth_error(ex):
 
 @app.errorhandler(Exception)
 def handle_generic_error(ex):
-    app.logger.error(f"Unexpected error: {str(ex)}", exc_info=True)
+    app.logger.error(f"Unexpected error: {str(ex)} [{request.method} {request.path}]", exc_info=True)
     return jsonify({
         "code": "internal_error",
         "description": "An unexpected error occurred"
     }), 500
 
 # Utility functions
+def require_admin_key():
+    """Check the X-Admin-Key header against ADMIN_API_KEY."""
+    admin_key = os.getenv('ADMIN_API_KEY')
+    if not admin_key:
+        raise AuthError({
+            "code": "configuration_error",
+            "description": "Admin access is not configured"
+        }, 403)
+    if not secrets.compare_digest(request.headers.get('X-Admin-Key', ''), admin_key):
+        raise AuthError({
+            "code": "forbidden",
+            "description": "Invalid admin key"
+        }, 403)
+
 def validate_password(password):
     """Password validation rules."""
     if len(password) < 8:
@@ -170,139 +213,157 @@ def linkedin_login():
             "description": str(e)
         }, 500)
 
+def complete_linkedin_login(code):
+    """Exchange an authorization code, upsert the user and return the frontend redirect URL."""
+    # Exchange code for access token
+    token_url = "https://www.linkedin.com/oauth/v2/accessToken"
+    token_data = {
+        "grant_type": "authorization_code",
+        "code": code,
+        "redirect_uri": os.getenv('LINKEDIN_REDIRECT_URI'),
+        "client_id": os.getenv('LINKEDIN_CLIENT_ID'),
+        "client_secret": os.getenv('LINKEDIN_SECRET_KEY')
+    }
+    
+    app.logger.info("Requesting access token...")
+    token_response = requests.post(token_url, data=token_data)
+    
+    if token_response.status_code != 200:
+        app.logger.error(f"Token error: {token_response.text}")
+        raise AuthError({
+            "code": "token_error",
+            "description": "Failed to get access token"
+        }, 500)
+    
+    token_data = token_response.json()
+    access_token = token_data.get('access_token')
+    
+    # Get user info
+    userinfo_url = "https://api.linkedin.com/v2/userinfo"
+    headers = {"Authorization": f"Bearer {access_token}"}
+    
+    app.logger.info("Requesting user info...")
+    userinfo_response = requests.get(userinfo_url, headers=headers)
+    
+    if userinfo_response.status_code != 200:
+        app.logger.error(f"Userinfo error: {userinfo_response.text}")
+        raise AuthError({
+            "code": "userinfo_error",
+            "description": "Failed to get user info"
+        }, 500)
+    
+    userinfo = userinfo_response.json()
+    app.logger.info(f"User info received: {userinfo}")
+    
+    # Extract user info
+    email = userinfo.get('email')
+    full_name = userinfo.get('name')
+    email_verified = userinfo.get('email_verified', False)
+    provider_id = userinfo.get('sub')  # LinkedIn's unique identifier
+    avatar_url = userinfo.get('picture')
+    
+    if not email:
+        raise AuthError({
+            "code": "missing_email",
+            "description": "Email not provided by LinkedIn"
+        }, 400)
+    
+    # Try to find existing user
+    existing_user = supabase.table('users').select('*').eq('email', email).execute()
+    
+    if len(existing_user.data) == 0:
+        # Create new user
+        user_data = {
+            'email': email,
+            'full_name': full_name,
+            'email_verified': email_verified,
+            'auth_provider': 'linkedin',
+            'provider_id': provider_id,
+            'avatar_url': avatar_url,
+            'onboarding_step': 1,
+            'onboarding_completed': False,
+            'last_sign_in': datetime.utcnow().isoformat()
+        }
+    
+        result = supabase.table('users').insert(user_data).execute()
+        user = result.data[0]
+        app.logger.info(f"Created new user: {user['id']}")
+    else:
+        # Update existing user
+        user = existing_user.data[0]
+        update_data = {
+            'full_name': full_name,
+            'email_verified': email_verified,
+            'auth_provider': 'linkedin',
+            'provider_id': provider_id,
+            'avatar_url': avatar_url,
+            'last_sign_in': datetime.utcnow().isoformat()
+        }
+    
+        result = supabase.table('users').update(update_data).eq('id', user['id']).execute()
+        user = result.data[0]
+        app.logger.info(f"Updated existing user: {user['id']}")
+    
+    # Generate JWT token with additional claims
+    access_token = create_access_token(
+        identity=user['id'],
+        additional_claims={
+            'email': email,
+            'full_name': full_name,
+            'onboarding_completed': user.get('onboarding_completed', False),
+            'onboarding_step': user.get('onboarding_step', 1),
+            'provider': 'linkedin'
+        }
+    )
+    
+    # Redirect to frontend with token
+    frontend_url = os.getenv('FRONTEND_URL')
+    if not user.get('onboarding_completed', False):
+        redirect_url = f"{frontend_url}/onboarding?token={access_token}&step={user.get('onboarding_step', 1)}"
+    else:
+        redirect_url = f"{frontend_url}/auth/callback?token={access_token}"
+    
+    return redirect_url
+
 @app.route('/api/auth/linkedin/callback')
 def linkedin_callback():
     try:
-        app.logger.info("Received callback request:")
-        app.logger.info(f"Args: {request.args}")
+        code = request.args.get('code')
+        received_state = request.args.get('state')
+        
+        # code and state can be exchanged for a JWT while a result is cached,
+        # so they are never logged
+        app.logger.info(f"Received callback request (code: {bool(code)}, state: {bool(received_state)})")
+        
+        # A late duplicate from the session that started this flow reuses the
+        # first result, even though that response already cleared oauth_state
+        redirect_url = linkedin_callbacks.reuse(session, code, received_state)
+        if redirect_url is not None:
+            app.logger.info("Reusing result of duplicate LinkedIn callback")
+            return redirect(redirect_url)
         
         # Verify state parameter
         expected_state = session.pop('oauth_state', None)
-        received_state = request.args.get('state')
         
         if not expected_state or expected_state != received_state:
-            app.logger.error(f"State mismatch. Expected: {expected_state}, Received: {received_state}")
+            app.logger.error("State mismatch in LinkedIn callback")
             raise AuthError({
                 "code": "invalid_state",
                 "description": "Invalid state parameter"
             }, 400)
             
         # Get the authorization code
-        code = request.args.get('code')
         if not code:
             raise AuthError({
                 "code": "missing_code",
                 "description": "No authorization code received"
             }, 400)
             
-        # Exchange code for access token
-        token_url = "https://www.linkedin.com/oauth/v2/accessToken"
-        token_data = {
-            "grant_type": "authorization_code",
-            "code": code,
-            "redirect_uri": os.getenv('LINKEDIN_REDIRECT_URI'),
-            "client_id": os.getenv('LINKEDIN_CLIENT_ID'),
-            "client_secret": os.getenv('LINKEDIN_SECRET_KEY')
-        }
-        
-        app.logger.info("Requesting access token...")
-        token_response = requests.post(token_url, data=token_data)
-        
-        if token_response.status_code != 200:
-            app.logger.error(f"Token error: {token_response.text}")
-            raise AuthError({
-                "code": "token_error",
-                "description": "Failed to get access token"
-            }, 500)
-            
-        token_data = token_response.json()
-        access_token = token_data.get('access_token')
-        
-        # Get user info
-        userinfo_url = "https://api.linkedin.com/v2/userinfo"
-        headers = {"Authorization": f"Bearer {access_token}"}
-        
-        app.logger.info("Requesting user info...")
-        userinfo_response = requests.get(userinfo_url, headers=headers)
-        
-        if userinfo_response.status_code != 200:
-            app.logger.error(f"Userinfo error: {userinfo_response.text}")
-            raise AuthError({
-                "code": "userinfo_error",
-                "description": "Failed to get user info"
-            }, 500)
-            
-        userinfo = userinfo_response.json()
-        app.logger.info(f"User info received: {userinfo}")
-        
-        # Extract user info
-        email = userinfo.get('email')
-        full_name = userinfo.get('name')
-        email_verified = userinfo.get('email_verified', False)
-        provider_id = userinfo.get('sub')  # LinkedIn's unique identifier
-        avatar_url = userinfo.get('picture')
-        
-        if not email:
-            raise AuthError({
-                "code": "missing_email",
-                "description": "Email not provided by LinkedIn"
-            }, 400)
-            
-        # Try to find existing user
-        existing_user = supabase.table('users').select('*').eq('email', email).execute()
-        
-        if len(existing_user.data) == 0:
-            # Create new user
-            user_data = {
-                'email': email,
-                'full_name': full_name,
-                'email_verified': email_verified,
-                'auth_provider': 'linkedin',
-                'provider_id': provider_id,
-                'avatar_url': avatar_url,
-                'onboarding_step': 1,
-                'onboarding_completed': False,
-                'last_sign_in': datetime.utcnow().isoformat()
-            }
-            
-            result = supabase.table('users').insert(user_data).execute()
-            user = result.data[0]
-            app.logger.info(f"Created new user: {user['id']}")
-        else:
-            # Update existing user
-            user = existing_user.data[0]
-            update_data = {
-                'full_name': full_name,
-                'email_verified': email_verified,
-                'auth_provider': 'linkedin',
-                'provider_id': provider_id,
-                'avatar_url': avatar_url,
-                'last_sign_in': datetime.utcnow().isoformat()
-            }
-            
-            result = supabase.table('users').update(update_data).eq('id', user['id']).execute()
-            user = result.data[0]
-            app.logger.info(f"Updated existing user: {user['id']}")
-            
-        # Generate JWT token with additional claims
-        access_token = create_access_token(
-            identity=user['id'],
-            additional_claims={
-                'email': email,
-                'full_name': full_name,
-                'onboarding_completed': user.get('onboarding_completed', False),
-                'onboarding_step': user.get('onboarding_step', 1),
-                'provider': 'linkedin'
-            }
+        # Concurrent duplicates carry the same oauth_state and join this flight
+        redirect_url = linkedin_callbacks.run(
+            session, code, received_state, lambda: complete_linkedin_login(code)
         )
         
-        # Redirect to frontend with token
-        frontend_url = os.getenv('FRONTEND_URL')
-        if not user.get('onboarding_completed', False):
-            redirect_url = f"{frontend_url}/onboarding?token={access_token}&step={user.get('onboarding_step', 1)}"
-        else:
-            redirect_url = f"{frontend_url}/auth/callback?token={access_token}"
-        
         return redirect(redirect_url)
         
     except Exception as e:
@@ -434,6 +495,24 @@ def login():
             "description": str(e)
         }, 500)
 
+@app.route('/api/auth/logout', methods=['POST'])
+@app.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Revoke the current access token and clear the session."""
+    claims = get_jwt()
+    try:
+        token_blocklist.revoke(claims['jti'], claims['exp'])
+    except Exception as e:
+        app.logger.error(f"Token revocation error: {str(e)}", exc_info=True)
+        raise AuthError({
+            "code": "logout_unavailable",
+            "description": "Could not revoke token, please retry"
+        }, 503)
+    session.clear()
+    app.logger.info(f"Revoked token for user: {get_jwt_identity()}")
+    return jsonify({'message': 'Logged out successfully'}), 200
+
 # User profile endpoint
 @app.route('/api/user/profile')
 @jwt_required()
@@ -482,6 +561,7 @@ def update_career_info():
             
             result = supabase.rpc('add_custom_university', {'university_name': custom_university}).execute()
             university_id = result.data[0]
+            reference_data.invalidate()
         
         # Update user's career information
         update_data = {
@@ -655,5 +735,62 @@ def get_onboarding_status():
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/onboarding/bootstrap', methods=['GET'])
+@jwt_required()
+def get_onboarding_bootstrap():
+    """Everything the onboarding screens need in a single round trip."""
+    try:
+        user_id = get_jwt_identity()
+
+        user_future = query_executor.submit(
+            lambda: supabase.table('users').select(
+                'onboarding_step,onboarding_completed,university_id,education_program_id,'
+                'career_goal,career_path,dream_companies,work_mode_preference,'
+                'personality_type,personality_test_url,cv_url'
+            ).eq('id', user_id).execute()
+        )
+        industries_future = query_executor.submit(
+            lambda: supabase.table('user_industries').select('industry_id').eq('user_id', user_id).execute()
+        )
+        # Warm the cache while the user queries run
+        reference_data.get()
+
+        user_result = user_future.result()
+        if not user_result.data:
+            return jsonify({'error': 'User not found'}), 404
+
+        user = user_result.data[0]
+        user['industry_ids'] = [row['industry_id'] for row in industries_future.result().data]
+
+        reference = reference_data.get_for_university(user.get('university_id'))
+
+        return jsonify({
+            'user': user,
+            'universities': reference['universities'],
+            'industries': reference['industries'],
+            'education_programs': reference['programs_by_university'].get(user.get('university_id'), [])
+        }), 200
+
+    except Exception as e:
+        app.logger.error(f"Onboarding bootstrap error: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 400
+
+# Admin endpoints
+@app.route('/api/admin/export/users', methods=['GET'])
+def export_users():
+    """Stream users, their industries and onboarding progress as NDJSON."""
+    require_admin_key()
+
+    page_size = clamp_page_size(request.args.get('page_size', DEFAULT_PAGE_SIZE))
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    filename = 'users.ndjson.gz' if compress else 'users.ndjson'
+
+    app.logger.info(f"Starting user export (page_size={page_size}, gzip={compress})")
+    return Response(
+        iter_ndjson(supabase, page_size, compress=compress),
+        mimetype='application/gzip' if compress else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
\ No newline at end of file
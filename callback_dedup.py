@@ -0,0 +1,41 @@
+"""Session-bound de-duplication of OAuth callbacks.
+
+A callback URL carries both the authorization code and the state, so the
+pair alone proves nothing about who sent it. The leader stores its flight
+key in the caller's session. A late duplicate may reuse the result only
+if its session carries that same key. Concurrent duplicates still carry
+the original oauth_state, so they pass the normal state check and join
+the running flight.
+"""
+import hashlib
+
+
+class CallbackDeduplicator:
+    """Wraps a SingleFlight group so results are only shared within one session."""
+
+    SESSION_KEY = 'oauth_flight'
+
+    def __init__(self, flight):
+        self.flight = flight
+
+    @staticmethod
+    def flight_key(code, state):
+        return hashlib.sha256(f"{code}:{state}".encode('utf-8')).hexdigest()
+
+    def reuse(self, session, code, state):
+        """Return a finished or in-flight result started by this session, else None."""
+        if not code or not state:
+            return None
+        flight_key = self.flight_key(code, state)
+        if session.get(self.SESSION_KEY) != flight_key:
+            return None
+        return self.flight.lookup(flight_key)
+
+    def run(self, session, code, state, fn):
+        """Run ``fn`` once per code/state, binding the result to ``session``.
+
+        Only call this after the session's oauth_state has been verified.
+        """
+        flight_key = self.flight_key(code, state)
+        session[self.SESSION_KEY] = flight_key
+        return self.flight.do(flight_key, fn)
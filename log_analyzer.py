@@ -0,0 +1,367 @@
+"""Analyze the rotated auth logs written by app.py.
+
+Records use the app.py formatter, so one entry spans several lines:
+
+    2024-11-25 20:26:21,472 ERROR: Unexpected error: 404 Not Found: ...
+    Details: (<class 'werkzeug.exceptions.NotFound'>, ...)
+    Path: /path/to/app.py:85
+    Traceback (most recent call last):
+      ...
+    werkzeug.exceptions.NotFound: 404 Not Found: ...
+
+Files are memory-mapped and parsed as a stream of lines, so the whole
+history is never held in memory. Errors are grouped by a normalized
+signature and reported with counts, a rate over time and the top routes.
+
+Usage:
+    python log_analyzer.py                      # logs/auth.log.10 .. logs/auth.log
+    python log_analyzer.py --bucket hour --top 5
+    python log_analyzer.py --follow             # then tail logs/auth.log
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+HEADER_RE = re.compile(
+    r'^(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) '
+    r'(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL): (?P<message>.*)$'
+)
+EXCEPTION_RE = re.compile(r'^(?P<type>[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)(?:: (?P<value>.*))?$')
+ROUTE_RE = re.compile(r'\[(?P<method>GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS) (?P<path>/[^\]\s]*)\]\s*$')
+
+# Order matters: the more specific patterns must run first
+NORMALIZERS = (
+    (re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.I), '<uuid>'),
+    (re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+'), '<email>'),
+    (re.compile(r'0x[0-9a-f]+', re.I), '0x?'),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "'?'"),
+    (re.compile(r'\b\d{4,}\b'), 'N'),
+)
+BUCKET_FORMATS = {
+    'minute': '%Y-%m-%d %H:%M',
+    'hour': '%Y-%m-%d %H:00',
+    'day': '%Y-%m-%d',
+}
+
+
+class LogRecord:
+    """One multi-line log entry."""
+
+    __slots__ = ('timestamp', 'level', 'message', 'source', 'route', 'exception', 'in_traceback', 'has_exc_info', 'lines')
+
+    def __init__(self, timestamp, level, message):
+        self.timestamp = timestamp
+        self.level = level
+        self.message = message
+        self.source = None
+        self.route = None
+        self.exception = None
+        self.in_traceback = False
+        self.has_exc_info = None  # unknown until a Details: line is seen
+        self.lines = 1
+
+    @property
+    def signature(self):
+        """Normalized key that groups repeats of the same error together."""
+        text = self.message
+        route = ROUTE_RE.search(text)
+        if route:
+            text = text[:route.start()].rstrip()
+        for pattern, replacement in NORMALIZERS:
+            text = pattern.sub(replacement, text)
+        if self.exception:
+            text = f"{self.exception}: {text}"
+        return f"{self.level} {text[:200]}"
+
+
+class RecordParser:
+    """Incremental parser that turns log lines into LogRecords.
+
+    feed() returns the previous record once a new header shows it is
+    complete; flush() returns whatever is still pending.
+    """
+
+    def __init__(self):
+        self.current = None
+
+    def feed(self, line):
+        line = line.rstrip('\r\n')
+        if not line:
+            return None
+
+        header = HEADER_RE.match(line)
+        if header:
+            done = self.current
+            self.current = LogRecord(header['timestamp'], header['level'], header['message'])
+            route = ROUTE_RE.search(header['message'])
+            if route:
+                self.current.route = f"{route['method']} {route['path']}"
+            return done
+
+        done = None
+        if self.current is None or line.startswith('Traceback') and (
+            self.current.exception or self.current.has_exc_info is False
+        ):
+            # A raw traceback not attached to any formatted record: either
+            # the previous one already had its traceback or logged no exc_info
+            done = self.current
+            self.current = LogRecord(None, 'TRACEBACK', '')
+            self.current.lines = 0
+
+        record = self.current
+        record.lines += 1
+        if line.startswith('Traceback'):
+            record.in_traceback = True
+        elif line.startswith('Details: ') and record.has_exc_info is None:
+            record.has_exc_info = line[9:].strip() != 'None'
+        elif line.startswith('Path: ') and record.source is None:
+            record.source = line[6:].strip()
+        elif record.in_traceback and not line.startswith((' ', '\t')):
+            # The final unindented line of a traceback names the exception
+            exception = EXCEPTION_RE.match(line)
+            if exception:
+                record.exception = exception['type']
+                if not record.message:
+                    record.message = exception['value'] or ''
+        return done
+
+    def flush(self):
+        done, self.current = self.current, None
+        return done
+
+
+class ErrorStats:
+    """Running aggregates over parsed records."""
+
+    def __init__(self, bucket='minute', min_level='ERROR'):
+        self.bucket_format = BUCKET_FORMATS[bucket]
+        self.levels = ('WARNING', 'ERROR', 'CRITICAL', 'TRACEBACK') if min_level == 'WARNING' \
+            else ('ERROR', 'CRITICAL', 'TRACEBACK')
+        self.total_records = 0
+        self.by_level = Counter()
+        self.by_signature = Counter()
+        self.first_seen = {}
+        self.last_seen = {}
+        self.by_bucket = Counter()
+        self.by_route = Counter()
+        self.routes_by_signature = defaultdict(Counter)
+
+    def add(self, record):
+        """Count ``record``; return True if it was an error worth reporting."""
+        self.total_records += 1
+        self.by_level[record.level] += 1
+        if record.level not in self.levels:
+            return False
+
+        signature = record.signature
+        self.by_signature[signature] += 1
+        if record.timestamp:
+            self.first_seen.setdefault(signature, record.timestamp)
+            self.last_seen[signature] = record.timestamp
+            bucket = datetime.strptime(record.timestamp[:19], '%Y-%m-%d %H:%M:%S').strftime(self.bucket_format)
+            self.by_bucket[bucket] += 1
+
+        # Requests are only known when app.py logged them; otherwise fall
+        # back to the source location from the "Path:" line
+        route = record.route or record.source or 'unknown'
+        self.by_route[route] += 1
+        self.routes_by_signature[signature][route] += 1
+        return True
+
+    def as_dict(self, top=10):
+        return {
+            'total_records': self.total_records,
+            'by_level': dict(self.by_level),
+            'signatures': [
+                {
+                    'signature': signature,
+                    'count': count,
+                    'first_seen': self.first_seen.get(signature),
+                    'last_seen': self.last_seen.get(signature),
+                    'top_routes': self.routes_by_signature[signature].most_common(3)
+                }
+                for signature, count in self.by_signature.most_common(top)
+            ],
+            'rate': sorted(self.by_bucket.items()),
+            'top_routes': self.by_route.most_common(top)
+        }
+
+
+def rotated_files(base_path):
+    """Return base_path and its rotations, oldest first (auth.log.N .. auth.log)."""
+    directory = os.path.dirname(base_path) or '.'
+    name = os.path.basename(base_path)
+    pattern = re.compile(rf'^{re.escape(name)}\.(\d+)$')
+
+    rotations = []
+    for entry in os.listdir(directory):
+        match = pattern.match(entry)
+        if match:
+            rotations.append((int(match.group(1)), os.path.join(directory, entry)))
+
+    files = [path for _, path in sorted(rotations, reverse=True)]
+    if os.path.exists(base_path):
+        files.append(base_path)
+    return files
+
+
+def iter_mmap_lines(f, start=0):
+    """Yield ``(line, end_offset)`` for each complete line of open file ``f`` after ``start``."""
+    size = os.fstat(f.fileno()).st_size
+    if size <= start:
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < size:
+            end = mm.find(b'\n', pos, size)
+            if end == -1:
+                # Partial last line; a follower picks it up once it is finished
+                return
+            yield mm[pos:end].decode('utf-8', 'replace'), end + 1
+            pos = end + 1
+
+
+def analyze(paths, stats, parser):
+    """Feed every complete line of ``paths`` through ``parser`` into ``stats``.
+
+    Returns the offset reached in the last file, for follow mode.
+    """
+    offset = 0
+    for path in paths:
+        offset = 0
+        with open(path, 'rb') as f:
+            for line, offset in iter_mmap_lines(f):
+                record = parser.feed(line)
+                if record:
+                    stats.add(record)
+    return offset
+
+
+def follow(path, stats, parser, offset, interval=1.0, out=sys.stdout, stop=None):
+    """Tail ``path`` from ``offset``, printing errors as their records complete.
+
+    The file is kept open, so lines written just before a rotation are
+    still read from the old file; the new file is then read from the start.
+    Rotated history is never read again. Runs until ``stop`` (a
+    threading.Event) is set, or forever when it is None.
+    """
+    def emit(record):
+        if record and stats.add(record):
+            out.write(f"{record.timestamp or '-'} {record.route or record.source or 'unknown'} {record.signature}\n")
+            out.flush()
+
+    f = None
+    idle = 0.0
+    try:
+        while stop is None or not stop.is_set():
+            if f is None:
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    time.sleep(interval)
+                    continue
+
+            if os.fstat(f.fileno()).st_size < offset:
+                # Truncated in place
+                offset = 0
+
+            progressed = False
+            for line, offset in iter_mmap_lines(f, offset):
+                emit(parser.feed(line))
+                progressed = True
+
+            try:
+                rotated = os.stat(path).st_ino != os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                rotated = True
+            if rotated:
+                # Drain lines written between the read above and the rename,
+                # then switch to the new file
+                for line, offset in iter_mmap_lines(f, offset):
+                    emit(parser.feed(line))
+                emit(parser.flush())
+                f.close()
+                f, offset = None, 0
+                continue
+
+            if progressed:
+                idle = 0.0
+            else:
+                idle += interval
+                # Nothing written for a while: the pending record is complete
+                if idle >= interval * 2:
+                    emit(parser.flush())
+            time.sleep(interval)
+    finally:
+        if f is not None:
+            f.close()
+
+
+def print_report(report, out=sys.stdout):
+    out.write(f"Records: {report['total_records']}  ")
+    out.write('  '.join(f"{level}={count}" for level, count in sorted(report['by_level'].items())))
+    out.write('\n\nTop error signatures:\n')
+    for item in report['signatures']:
+        out.write(f"{item['count']:>8}  {item['signature']}\n")
+        out.write(f"          first {item['first_seen'] or '-'}  last {item['last_seen'] or '-'}\n")
+        for route, count in item['top_routes']:
+            out.write(f"          {count:>6}  {route}\n")
+
+    out.write('\nErrors over time:\n')
+    peak = max((count for _, count in report['rate']), default=0)
+    for bucket, count in report['rate']:
+        bar = '#' * max(1, round(40 * count / peak))
+        out.write(f"  {bucket}  {count:>6}  {bar}\n")
+
+    out.write('\nTop routes:\n')
+    for route, count in report['top_routes']:
+        out.write(f"{count:>8}  {route}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize errors in the rotated auth logs')
+    parser.add_argument('log', nargs='?', default='logs/auth.log', help='Live log file (default: logs/auth.log)')
+    parser.add_argument('--bucket', choices=sorted(BUCKET_FORMATS), default='minute', help='Rate bucket size')
+    parser.add_argument('--top', type=int, default=10, help='Number of signatures and routes to show')
+    parser.add_argument('--include-warnings', action='store_true', help='Count WARNING records as errors')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--follow', action='store_true', help='Keep tailing the live log after the report')
+    parser.add_argument('--interval', type=float, default=1.0, help='Follow poll interval in seconds')
+    args = parser.parse_args(argv)
+
+    stats = ErrorStats(args.bucket, 'WARNING' if args.include_warnings else 'ERROR')
+    record_parser = RecordParser()
+    files = rotated_files(args.log)
+    offset = analyze(files, stats, record_parser)
+    if files and files[-1] != args.log:
+        offset = 0
+
+    record = record_parser.flush()
+    if record:
+        stats.add(record)
+
+    report = stats.as_dict(args.top)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print_report(report)
+
+    if args.follow:
+        sys.stdout.write(f"\nFollowing {args.log} (Ctrl-C to stop)...\n")
+        sys.stdout.flush()
+        try:
+            follow(args.log, stats, record_parser, offset, args.interval)
+        except KeyboardInterrupt:
+            sys.stdout.write('\n')
+            print_report(stats.as_dict(args.top))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Cached onboarding reference data (universities, programs, industries).
+
+These tables change rarely and are the same for every user, so they are
+loaded once, shaped for the bootstrap response and reused until the TTL
+runs out.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Stay at or below PostgREST's default max_rows so short pages mean "done"
+PAGE_SIZE = 1000
+
+
+class ReferenceDataCache:
+    """TTL cache over the universities, education_programs and industries tables."""
+
+    def __init__(self, client, ttl=300, executor=None):
+        self.client = client
+        self.ttl = ttl
+        self.executor = executor or ThreadPoolExecutor(max_workers=3)
+        self._data = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the cached reference data, reloading it once the TTL has passed."""
+        data = self._data
+        if data is not None and time.monotonic() < self._expires_at:
+            return data
+        with self._lock:
+            # Another request may have reloaded while we waited for the lock
+            if self._data is not None and time.monotonic() < self._expires_at:
+                return self._data
+            generation = self._generation
+            self._data = self._load()
+            # An invalidate() during the load means the data may predate the
+            # change, so keep it for this caller but reload on the next get()
+            if generation == self._generation:
+                self._expires_at = time.monotonic() + self.ttl
+            return self._data
+
+    def get_for_university(self, university_id):
+        """Like get(), but reload once if ``university_id`` is not in the cache.
+
+        invalidate() only reaches the process that added a custom university;
+        this lets other workers pick it up for the user who chose it.
+        """
+        data = self.get()
+        if university_id and university_id not in data['university_ids']:
+            self.invalidate()
+            data = self.get()
+        return data
+
+    def invalidate(self):
+        """Force the next get() in this process to reload from the database."""
+        self._generation += 1
+        self._expires_at = 0.0
+
+    def _fetch_all(self, table, columns):
+        """Read every row of ``table`` in PAGE_SIZE ranges, ordered by name."""
+        rows = []
+        while True:
+            page = self.client.table(table).select(columns).order('name').order('id') \
+                .range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+
+    def _load(self):
+        universities = self.executor.submit(self._fetch_all, 'universities', 'id,name,country,is_custom')
+        programs = self.executor.submit(self._fetch_all, 'education_programs', 'id,university_id,name,degree_level')
+        industries = self.executor.submit(self._fetch_all, 'industries', 'id,name')
+
+        programs_by_university = {}
+        for program in programs.result():
+            programs_by_university.setdefault(program['university_id'], []).append(program)
+
+        universities = universities.result()
+        return {
+            'universities': universities,
+            'university_ids': {university['id'] for university in universities},
+            'industries': industries.result(),
+            'programs_by_university': programs_by_university
+        }
@@ -0,0 +1,95 @@
+"""Collapse duplicate concurrent calls for the same key into one.
+
+The first caller for a key runs the function. Callers that arrive while it
+is running wait for it and share its outcome. So do callers that arrive
+shortly after it finished, within ``ttl`` seconds. Errors are shared the
+same way, because a retry would fail just like the original call did.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Call:
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class SingleFlight:
+    """Per-process single-flight group with a short-lived, bounded result cache."""
+
+    def __init__(self, ttl=30, max_entries=1024, wait_timeout=30):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._inflight = {}
+        self._results = OrderedDict()  # key -> (expires_at, _Call), oldest first
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return ``fn()``; run it only once for concurrent or recent calls with ``key``."""
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+
+            cached = self._results.get(key)
+            if cached is not None:
+                return cached[1].outcome()
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+
+        if not leader:
+            if not call.event.wait(self.wait_timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight call {key}")
+            return call.outcome()
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                self._results[key] = (time.monotonic() + self.ttl, call)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+            call.event.set()
+        return call.outcome()
+
+    def lookup(self, key, default=None):
+        """Return the outcome of a recent or in-flight call for ``key`` without starting one.
+
+        Returns ``default`` when nothing is cached or running for ``key``.
+        """
+        with self._lock:
+            self._evict(time.monotonic())
+            cached = self._results.get(key)
+            if cached is not None:
+                return cached[1].outcome()
+            call = self._inflight.get(key)
+            if call is None:
+                return default
+
+        if not call.event.wait(self.wait_timeout):
+            raise TimeoutError(f"Timed out waiting for in-flight call {key}")
+        return call.outcome()
+
+    def _evict(self, now):
+        # Entries share one TTL, so insertion order is also expiry order
+        while self._results:
+            key, (expires_at, _) = next(iter(self._results.items()))
+            if expires_at > now:
+                break
+            del self._results[key]
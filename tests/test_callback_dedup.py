@@ -0,0 +1,80 @@
+import threading
+
+from callback_dedup import CallbackDeduplicator
+from singleflight import SingleFlight
+
+
+def make_dedup():
+    return CallbackDeduplicator(SingleFlight(ttl=30))
+
+
+def test_same_session_reuses_result_without_second_exchange():
+    dedup = make_dedup()
+    session = {'oauth_state': 'state-1'}
+    calls = []
+
+    def exchange():
+        calls.append(1)
+        return 'https://app/onboarding?token=jwt'
+
+    assert dedup.run(session, 'code-1', 'state-1', exchange) == 'https://app/onboarding?token=jwt'
+    # The first response cleared oauth_state; the flight key is still there
+    session.pop('oauth_state')
+
+    assert dedup.reuse(session, 'code-1', 'state-1') == 'https://app/onboarding?token=jwt'
+    assert calls == [1]
+
+
+def test_replay_without_originating_session_is_rejected():
+    dedup = make_dedup()
+    dedup.run({}, 'code-1', 'state-1', lambda: 'https://app/callback?token=victim')
+
+    # Another browser replaying the leaked URL, with and without its own flow
+    assert dedup.reuse({}, 'code-1', 'state-1') is None
+    assert dedup.reuse({'oauth_state': 'attacker'}, 'code-1', 'state-1') is None
+
+
+def test_session_bound_to_other_flight_is_rejected():
+    dedup = make_dedup()
+    attacker_session = {}
+    dedup.run(attacker_session, 'code-2', 'state-2', lambda: 'attacker-result')
+    dedup.run({}, 'code-1', 'state-1', lambda: 'victim-result')
+
+    assert dedup.reuse(attacker_session, 'code-1', 'state-1') is None
+    assert dedup.reuse(attacker_session, 'code-2', 'state-2') == 'attacker-result'
+
+
+def test_missing_code_or_state_never_reuses():
+    dedup = make_dedup()
+    session = {}
+    dedup.run(session, 'code-1', 'state-1', lambda: 'result')
+
+    assert dedup.reuse(session, None, 'state-1') is None
+    assert dedup.reuse(session, 'code-1', None) is None
+
+
+def test_concurrent_duplicates_join_one_exchange():
+    dedup = make_dedup()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def exchange():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    results = []
+    # Both requests carry the original cookie and pass the state check
+    first = threading.Thread(target=lambda: results.append(dedup.run({}, 'code-1', 'state-1', exchange)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(dedup.run({}, 'code-1', 'state-1', exchange)))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert calls == [1]
+    assert results == ['result', 'result']
@@ -0,0 +1,134 @@
+import io
+import os
+import threading
+import time
+
+from log_analyzer import ErrorStats, RecordParser, follow, rotated_files
+
+FORMATTED_404 = """\
+2024-11-25 20:26:21,472 ERROR: Unexpected error: 404 Not Found: The requested URL was not found on the server. [GET /api/users/{uuid}]
+Details: (<class 'werkzeug.exceptions.NotFound'>, <NotFound '404: Not Found'>, <traceback object at {address}>)
+Path: /srv/app.py:85
+Traceback (most recent call last):
+  File "/usr/lib/python3.10/site-packages/flask/app.py", line 917, in full_dispatch_request
+    rv = self.dispatch_request()
+werkzeug.exceptions.NotFound: 404 Not Found: The requested URL was not found on the server.
+"""
+
+BARE_TRACEBACK = """\
+Traceback (most recent call last):
+  File "/srv/worker.py", line 12, in run
+    connect()
+ConnectionError: connection refused
+"""
+
+DETAILS_NONE = """\
+2024-11-25 20:30:00,000 ERROR: Auth error: {'code': 'invalid_state'}
+Details: None
+Path: /srv/app.py:66
+"""
+
+
+def parse(text):
+    parser = RecordParser()
+    records = [parser.feed(line) for line in text.splitlines()]
+    records.append(parser.flush())
+    return [record for record in records if record]
+
+
+def test_formatted_record_with_traceback():
+    [record] = parse(FORMATTED_404.format(uuid='a' * 8 + '-1111-2222-3333-' + 'b' * 12, address='0x7e21'))
+
+    assert record.level == 'ERROR'
+    assert record.timestamp == '2024-11-25 20:26:21,472'
+    assert record.route.startswith('GET /api/users/')
+    assert record.source == '/srv/app.py:85'
+    assert record.exception == 'werkzeug.exceptions.NotFound'
+    assert record.lines == 7
+
+
+def test_bare_traceback_becomes_its_own_record():
+    records = parse(DETAILS_NONE + BARE_TRACEBACK)
+
+    assert [record.level for record in records] == ['ERROR', 'TRACEBACK']
+    assert records[1].exception == 'ConnectionError'
+    assert records[1].message == 'connection refused'
+    assert records[1].lines == 4
+
+
+def test_traceback_at_start_of_file_is_kept():
+    [record] = parse(BARE_TRACEBACK)
+
+    assert record.level == 'TRACEBACK'
+    assert record.timestamp is None
+    assert record.signature == 'TRACEBACK ConnectionError: connection refused'
+
+
+def test_details_none_record():
+    [record] = parse(DETAILS_NONE)
+
+    assert record.exception is None
+    assert record.source == '/srv/app.py:66'
+    assert record.lines == 3
+
+
+def test_signature_ignores_routes_ids_addresses_and_emails():
+    first = parse(FORMATTED_404.format(uuid='0f8fad5b-d9cb-469f-a165-70867728950e', address='0x7e2179ec5ac0'))
+    second = parse(FORMATTED_404.format(uuid='7c9e6679-7425-40de-944b-e07fc1f90ae7', address='0x7e2179ea8f40'))
+    stats = ErrorStats()
+    for record in first + second:
+        stats.add(record)
+
+    assert len(stats.by_signature) == 1
+    assert len(stats.by_route) == 2
+
+    by_email = [
+        parse(f"2024-11-25 20:30:00,000 ERROR: Login error: no user {email}\n")[0]
+        for email in ('a@example.com', 'b.c@example.org')
+    ]
+    assert by_email[0].signature == by_email[1].signature
+
+
+def test_rotated_files_are_ordered_oldest_first(tmp_path):
+    for name in ('auth.log', 'auth.log.1', 'auth.log.2', 'auth.log.10', 'auth.log.bak', 'other.log.3'):
+        (tmp_path / name).write_text('')
+
+    files = [os.path.basename(path) for path in rotated_files(str(tmp_path / 'auth.log'))]
+
+    assert files == ['auth.log.10', 'auth.log.2', 'auth.log.1', 'auth.log']
+
+
+def test_follow_reads_lines_written_just_before_rotation(tmp_path, monkeypatch):
+    live = tmp_path / 'auth.log'
+    live.write_text('2024-11-26 10:00:00,000 ERROR: Unexpected error: first\n')
+    real_stat = os.stat
+    rotated = []
+
+    def stat_with_rotation(path, *args, **kwargs):
+        # Simulate the handler appending and rotating between the follower's
+        # read and its inode check
+        if str(path) == str(live) and not rotated:
+            rotated.append(True)
+            with open(live, 'a') as f:
+                f.write('2024-11-26 10:00:01,000 ERROR: Unexpected error: before rotation\n')
+            os.rename(live, tmp_path / 'auth.log.1')
+            live.write_text('2024-11-26 10:00:02,000 ERROR: Unexpected error: after rotation\n')
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, 'stat', stat_with_rotation)
+
+    out = io.StringIO()
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=follow, args=(str(live), ErrorStats(), RecordParser(), 0),
+        kwargs={'interval': 0.01, 'out': out, 'stop': stop}
+    )
+    thread.start()
+    deadline = time.time() + 5
+    while 'after rotation' not in out.getvalue() and time.time() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    thread.join(5)
+
+    lines = out.getvalue().splitlines()
+    assert [line.rsplit(': ', 1)[-1] for line in lines] == ['first', 'before rotation', 'after rotation']
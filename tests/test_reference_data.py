@@ -0,0 +1,124 @@
+import reference_data
+from reference_data import ReferenceDataCache
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.bounds = None
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        self.client.ranges.append((self.table, self.bounds))
+        if self.client.on_execute:
+            self.client.on_execute(self.table)
+        start, end = self.bounds
+        return FakeResult(self.client.tables[self.table][start:end + 1])
+
+
+class FakeClient:
+    def __init__(self, tables):
+        self.tables = tables
+        self.ranges = []
+        self.on_execute = None
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def make_tables(universities=3, programs=4):
+    return {
+        'universities': [{'id': f'u{i}', 'name': f'University {i}'} for i in range(universities)],
+        'education_programs': [
+            {'id': f'p{i}', 'university_id': f'u{i % 2}', 'name': f'Program {i}'} for i in range(programs)
+        ],
+        'industries': [{'id': 'i0', 'name': 'Technology'}],
+    }
+
+
+def test_short_page_ends_paging(monkeypatch):
+    monkeypatch.setattr(reference_data, 'PAGE_SIZE', 2)
+    client = FakeClient(make_tables(universities=5))
+    data = ReferenceDataCache(client).get()
+
+    assert [u['id'] for u in data['universities']] == ['u0', 'u1', 'u2', 'u3', 'u4']
+    assert [bounds for table, bounds in client.ranges if table == 'universities'] == [(0, 1), (2, 3), (4, 5)]
+
+
+def test_exact_multiple_of_page_size_reads_one_empty_page(monkeypatch):
+    monkeypatch.setattr(reference_data, 'PAGE_SIZE', 2)
+    client = FakeClient(make_tables(programs=4))
+    data = ReferenceDataCache(client).get()
+
+    assert [bounds for table, bounds in client.ranges if table == 'education_programs'] == [(0, 1), (2, 3), (4, 5)]
+    assert [p['id'] for p in data['programs_by_university']['u0']] == ['p0', 'p2']
+    assert [p['id'] for p in data['programs_by_university']['u1']] == ['p1', 'p3']
+
+
+def test_results_are_cached_until_invalidated():
+    client = FakeClient(make_tables())
+    cache = ReferenceDataCache(client, ttl=300)
+
+    first = cache.get()
+    calls = len(client.ranges)
+    assert cache.get() is first
+    assert len(client.ranges) == calls
+
+    cache.invalidate()
+    assert cache.get() is not first
+    assert len(client.ranges) > calls
+
+
+def test_load_racing_invalidate_does_not_get_a_fresh_ttl():
+    client = FakeClient(make_tables())
+    cache = ReferenceDataCache(client, ttl=300)
+    raced = []
+
+    def invalidate_during_first_load(table):
+        if not raced:
+            raced.append(True)
+            # Runs on an executor thread while get() is still loading
+            cache.invalidate()
+
+    client.on_execute = invalidate_during_first_load
+    stale = cache.get()
+    client.on_execute = None
+
+    assert cache.get() is not stale
+
+
+def test_unknown_university_triggers_one_reload():
+    tables = make_tables()
+    client = FakeClient(tables)
+    cache = ReferenceDataCache(client, ttl=300)
+    cache.get()
+
+    # Another worker added a custom university after this cache was loaded
+    tables['universities'].append({'id': 'custom', 'name': 'Custom University'})
+    data = cache.get_for_university('custom')
+
+    assert 'custom' in data['university_ids']
+
+
+def test_known_or_missing_university_uses_cache():
+    client = FakeClient(make_tables())
+    cache = ReferenceDataCache(client, ttl=300)
+    first = cache.get()
+
+    assert cache.get_for_university('u1') is first
+    assert cache.get_for_university(None) is first
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight(ttl=30)
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'redirect'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', fn)))
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(flight.do('k', fn))) for _ in range(4)]
+    for t in waiters:
+        t.start()
+    release.set()
+    for t in [leader] + waiters:
+        t.join(5)
+
+    assert calls == [1]
+    assert results == ['redirect'] * 5
+
+
+def test_recent_result_is_reused_until_ttl():
+    flight = SingleFlight(ttl=0.05)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do('k', fn) == 1
+    assert flight.do('k', fn) == 1
+    time.sleep(0.1)
+    assert flight.do('k', fn) == 2
+
+
+def test_errors_are_cached():
+    flight = SingleFlight(ttl=30)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ValueError('code already used')
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            flight.do('k', fn)
+    assert calls == [1]
+
+
+def test_size_bound_evicts_oldest():
+    flight = SingleFlight(ttl=30, max_entries=2)
+    for key in ('a', 'b', 'c'):
+        flight.do(key, lambda: key)
+
+    assert flight.lookup('a') is None
+    assert flight.lookup('b') == 'b'
+    assert flight.lookup('c') == 'c'
+
+
+def test_lookup_does_not_start_a_call():
+    flight = SingleFlight(ttl=30)
+    assert flight.lookup('missing', 'default') == 'default'
+    flight.do('k', lambda: 'value')
+    assert flight.lookup('k') == 'value'
+
+
+def test_lookup_waits_for_in_flight_call():
+    flight = SingleFlight(ttl=30)
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    leader = threading.Thread(target=lambda: flight.do('k', fn))
+    leader.start()
+    started.wait(5)
+    threading.Timer(0.05, release.set).start()
+    assert flight.lookup('k') == 'value'
+    leader.join(5)
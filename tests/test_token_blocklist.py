@@ -0,0 +1,110 @@
+import sqlite3
+import time
+
+import pytest
+
+from token_blocklist import BloomFilter, MemoryBackend, SQLiteBackend, TokenBlocklist
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f'jti-{i}' for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+
+
+def test_bloom_filter_false_positive_rate_is_near_target():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    for i in range(2000):
+        bloom.add(f'jti-{i}')
+
+    false_positives = sum(f'other-{i}' in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+
+
+def test_revoked_token_is_rejected_until_it_expires():
+    now = time.time()
+    blocklist = TokenBlocklist(MemoryBackend(), capacity=100, sync_interval=0)
+    blocklist.revoke('short', now + 0.05)
+    blocklist.revoke('long', now + 60)
+
+    assert blocklist.is_revoked('short')
+    assert blocklist.is_revoked('long')
+    assert not blocklist.is_revoked('never-revoked')
+
+    time.sleep(0.1)
+    assert not blocklist.is_revoked('short')
+    assert blocklist.is_revoked('long')
+
+
+def test_bloom_filter_is_rebuilt_once_expired_keys_dominate():
+    now = time.time()
+    blocklist = TokenBlocklist(MemoryBackend(), capacity=100, sync_interval=0)
+    for i in range(10):
+        blocklist.revoke(f'old-{i}', now - 1)
+    blocklist.revoke('live', now + 60)
+    old_bloom = blocklist._bloom
+
+    blocklist.sync(now)
+
+    assert blocklist._bloom is not old_bloom
+    assert blocklist._revoked == {'live': now + 60}
+    assert 'live' in blocklist._bloom
+    assert blocklist.is_revoked('live')
+
+
+def test_memory_backend_drops_expired_prefix():
+    backend = MemoryBackend()
+    backend.add('a', 10)
+    backend.add('b', 20)
+    backend.add('c', 30)
+
+    entries, cursor = backend.fetch_since(0)
+    assert [jti for jti, _ in entries] == ['a', 'b', 'c']
+
+    backend.purge_expired(20)
+    assert len(backend._entries) == 1
+
+    # Cursors from before and after the purge keep working
+    assert backend.fetch_since(0) == ([('c', 30)], 3)
+    assert backend.fetch_since(cursor) == ([], cursor)
+    backend.add('d', 40)
+    assert backend.fetch_since(cursor) == ([('d', 40)], 4)
+
+
+def test_sqlite_backend_shares_revocations_between_workers(tmp_path):
+    path = str(tmp_path / 'blocklist.db')
+    worker_a = TokenBlocklist(SQLiteBackend(path), capacity=100, sync_interval=0)
+    worker_b = TokenBlocklist(SQLiteBackend(path), capacity=100, sync_interval=0)
+
+    worker_a.revoke('jti-1', time.time() + 60)
+
+    assert worker_b.is_revoked('jti-1')
+    assert not worker_b.is_revoked('jti-2')
+
+
+def test_backend_errors_do_not_break_revocation_checks():
+    class FailingBackend(MemoryBackend):
+        def fetch_since(self, cursor):
+            raise sqlite3.OperationalError('database is locked')
+
+    blocklist = TokenBlocklist(FailingBackend(), capacity=100, sync_interval=0)
+    blocklist.revoke('jti-1', time.time() + 60)
+
+    assert blocklist.is_revoked('jti-1')
+    assert not blocklist.is_revoked('jti-2')
+
+
+def test_failed_backend_write_does_not_revoke_locally():
+    class FailingBackend(MemoryBackend):
+        def add(self, jti, expires_at):
+            raise sqlite3.OperationalError('database is locked')
+
+    blocklist = TokenBlocklist(FailingBackend(), capacity=100, sync_interval=0)
+
+    with pytest.raises(sqlite3.OperationalError):
+        blocklist.revoke('jti-1', time.time() + 60)
+    # Every worker agrees the token is still valid, so a retry is consistent
+    assert not blocklist.is_revoked('jti-1')
@@ -0,0 +1,106 @@
+import gzip
+import json
+
+from user_export import MAX_PAGE_SIZE, clamp_page_size, iter_ndjson, iter_user_pages
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Just enough of the PostgREST query builder for keyset pagination."""
+
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.after_id = None
+        self.page_size = None
+
+    def select(self, columns):
+        return self
+
+    def gt(self, column, value):
+        assert column == 'id'
+        self.after_id = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, page_size):
+        self.page_size = page_size
+        return self
+
+    def execute(self):
+        self.log.append(self.after_id)
+        rows = sorted(self.rows, key=lambda row: row['id'])
+        if self.after_id is not None:
+            rows = [row for row in rows if row['id'] > self.after_id]
+        return FakeResult([dict(row) for row in rows[:self.page_size]])
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.log = []
+
+    def table(self, name):
+        assert name == 'users'
+        return FakeQuery(self.rows, self.log)
+
+
+def make_users(count):
+    # created_at is nullable and not the pagination key
+    return [
+        {
+            'id': f'{i:04d}',
+            'created_at': None if i % 4 == 0 else f'2024-01-{1 + i // 3:02d}T00:00:00+00:00',
+            'user_industries': [{'industry_id': f'ind-{i}'}, {'industry_id': 'ind-x'}] if i % 2 else []
+        }
+        for i in range(count)
+    ]
+
+
+def test_keyset_pages_cover_every_user_once():
+    client = FakeClient(make_users(11))
+    pages = list(iter_user_pages(client, page_size=4))
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    assert [user['id'] for page in pages for user in page] == [f'{i:04d}' for i in range(11)]
+    # The cursor resumes after the last id of the previous page
+    assert client.log == [None, '0003', '0007']
+
+
+def test_users_without_created_at_are_exported():
+    client = FakeClient(make_users(9))
+    ids = [user['id'] for page in iter_user_pages(client, page_size=2) for user in page]
+
+    assert {'0000', '0004', '0008'} <= set(ids)
+    assert len(ids) == 9
+
+
+def test_exact_multiple_of_page_size_ends_on_empty_page():
+    client = FakeClient(make_users(8))
+    pages = list(iter_user_pages(client, page_size=4))
+
+    assert [len(page) for page in pages] == [4, 4]
+    assert len(client.log) == 3
+
+
+def test_ndjson_flattens_embedded_industries_and_gzips():
+    client = FakeClient(make_users(5))
+    body = b''.join(iter_ndjson(client, page_size=2, compress=True))
+    records = [json.loads(line) for line in gzip.decompress(body).decode('utf-8').splitlines()]
+
+    assert len(records) == 5
+    assert 'user_industries' not in records[0]
+    assert records[0]['industry_ids'] == []
+    assert records[1]['industry_ids'] == ['ind-1', 'ind-x']
+
+
+def test_clamp_page_size():
+    assert clamp_page_size(10 ** 6) == MAX_PAGE_SIZE
+    assert clamp_page_size(0) == 1
+    assert clamp_page_size('abc') == 500
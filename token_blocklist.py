@@ -0,0 +1,244 @@
+"""JWT revocation: a Bloom filter in front of an exact, expiring denylist.
+
+Every ``@jwt_required()`` request asks ``is_revoked(jti)``. Almost all tokens
+are not revoked, so the answer comes from the Bloom filter without touching
+the exact set. Revocations are written to a backend so that every worker on
+the host picks them up on its next sync.
+"""
+import hashlib
+import heapq
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys."""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing (Kirsch-Mitzenmacher) from a single 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        # Inlined so a miss usually returns after the first probe or two
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        bits, num_bits = self.bits, self.num_bits
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class MemoryBackend:
+    """Process-local backend; revocations are only seen by this worker."""
+
+    def __init__(self):
+        self._entries = deque()  # (seq, jti, expires_at), oldest first
+        self._next_seq = 1
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._entries.append((self._next_seq, jti, expires_at))
+            self._next_seq += 1
+
+    def fetch_since(self, cursor):
+        """Return ``(entries, new_cursor)`` for entries added after ``cursor``."""
+        with self._lock:
+            if not self._entries:
+                return [], cursor
+            start = max(cursor + 1 - self._entries[0][0], 0)
+            rows = list(islice(self._entries, start, None))
+            if not rows:
+                return [], cursor
+            return [(jti, expires_at) for _, jti, expires_at in rows], rows[-1][0]
+
+    def purge_expired(self, now):
+        # Tokens share one lifetime, so expiry roughly follows insertion
+        # order; dropping the expired prefix keeps the deque bounded
+        with self._lock:
+            while self._entries and self._entries[0][2] <= now:
+                self._entries.popleft()
+
+
+class SQLiteBackend:
+    """Backend shared by all workers on a host through a local SQLite file."""
+
+    def __init__(self, path, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS revoked_tokens ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'jti TEXT NOT NULL, '
+            'expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at ON revoked_tokens (expires_at)')
+        conn.commit()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, jti, expires_at):
+        conn = self._connect()
+        conn.execute('INSERT INTO revoked_tokens (jti, expires_at) VALUES (?, ?)', (jti, expires_at))
+        conn.commit()
+
+    def fetch_since(self, cursor):
+        """Return ``(entries, new_cursor)`` for entries added after ``cursor``."""
+        rows = self._connect().execute(
+            'SELECT seq, jti, expires_at FROM revoked_tokens WHERE seq > ? ORDER BY seq',
+            (cursor,)
+        ).fetchall()
+        if not rows:
+            return [], cursor
+        return [(jti, expires_at) for _, jti, expires_at in rows], rows[-1][0]
+
+    def purge_expired(self, now):
+        conn = self._connect()
+        conn.execute('DELETE FROM revoked_tokens WHERE expires_at <= ?', (now,))
+        conn.commit()
+
+
+class TokenBlocklist:
+    """Revoked-token check backed by a Bloom filter and an exact expiring set."""
+
+    def __init__(self, backend=None, capacity=100000, error_rate=0.001, sync_interval=1.0, purge_interval=60.0):
+        self.backend = backend or MemoryBackend()
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked = {}  # jti -> expiry as a unix timestamp
+        self._expiry_heap = []
+        self._stale = 0  # expired keys still set in the Bloom filter
+        self._cursor = 0
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, expires_at):
+        """Record ``jti`` as revoked until ``expires_at`` (unix timestamp).
+
+        The backend is written first so a failure leaves no worker treating
+        the token as revoked; callers should surface the error for a retry.
+        """
+        self.backend.add(jti, float(expires_at))
+        with self._lock:
+            self._insert(jti, float(expires_at))
+
+        # Backend cleanup runs on logout, never on the is_revoked() path
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            try:
+                self.backend.purge_expired(now)
+            except Exception:
+                logger.warning("Token blocklist purge failed", exc_info=True)
+
+    def is_revoked(self, jti):
+        """Return True if ``jti`` has been revoked and has not yet expired."""
+        now = time.time()
+        if now >= self._next_sync:
+            self.sync(now)
+        if jti not in self._bloom:
+            return False
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > now
+
+    def sync(self, now=None):
+        """Pull revocations made by other workers and drop expired entries.
+
+        Backend errors are logged and the local state keeps serving until
+        the next sync succeeds.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+            try:
+                entries, self._cursor = self.backend.fetch_since(self._cursor)
+            except Exception:
+                logger.warning("Token blocklist sync failed", exc_info=True)
+                entries = []
+            for jti, expires_at in entries:
+                self._insert(jti, expires_at)
+            self._expire(now)
+
+    def _insert(self, jti, expires_at):
+        if expires_at > self._revoked.get(jti, 0):
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._expiry_heap, (expires_at, jti))
+        self._bloom.add(jti)
+
+    def _expire(self, now):
+        heap = self._expiry_heap
+        expired = []
+        while heap and heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(heap)
+            # Skip stale heap entries for tokens whose expiry was extended
+            if self._revoked.get(jti) == expires_at:
+                del self._revoked[jti]
+                expired.append(jti)
+        if not expired:
+            return
+        # Bloom filters cannot delete, so rebuild from the live set once
+        # expired keys outnumber live ones and inflate the false-positive rate
+        self._stale += len(expired)
+        if self._stale >= len(self._revoked):
+            self._stale = 0
+            self._bloom = BloomFilter(max(self.capacity, len(self._revoked) * 2), self.error_rate)
+            for jti in self._revoked:
+                self._bloom.add(jti)
+
+
+def create_blocklist_from_env():
+    """Build a TokenBlocklist from TOKEN_BLOCKLIST_* environment variables."""
+    backend_name = os.getenv('TOKEN_BLOCKLIST_BACKEND', 'sqlite').lower()
+    if backend_name == 'memory':
+        backend = MemoryBackend()
+    elif backend_name == 'sqlite':
+        backend = SQLiteBackend(os.getenv('TOKEN_BLOCKLIST_PATH', 'data/token_blocklist.db'))
+    else:
+        raise ValueError(f"Unknown TOKEN_BLOCKLIST_BACKEND: {backend_name}")
+
+    return TokenBlocklist(
+        backend=backend,
+        capacity=int(os.getenv('TOKEN_BLOCKLIST_CAPACITY', 100000)),
+        sync_interval=float(os.getenv('TOKEN_BLOCKLIST_SYNC_INTERVAL', 1.0))
+    )
@@ -0,0 +1,122 @@
+"""Streaming NDJSON export of users, their industries and onboarding progress.
+
+Users are read with keyset pagination on the id primary key. Each page is
+then a bounded range scan of the primary key index, however deep into the
+table the export is. Rows with a NULL created_at are still included.
+Records are produced by generators, so memory stays flat whether the
+output goes to an HTTP response or a file.
+
+Usage:
+    python user_export.py -o users.ndjson
+    python user_export.py --gzip -o users.ndjson.gz --page-size 1000
+"""
+import argparse
+import json
+import os
+import sys
+import zlib
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    'id,email,full_name,email_verified,auth_provider,university_id,education_program_id,'
+    'career_goal,career_path,dream_companies,work_mode_preference,personality_type,'
+    'cv_url,onboarding_step,onboarding_completed,created_at,updated_at,last_sign_in,'
+    'user_industries(industry_id)'
+)
+
+
+def clamp_page_size(page_size):
+    """Keep page sizes within 1..MAX_PAGE_SIZE."""
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def iter_user_pages(client, page_size=DEFAULT_PAGE_SIZE):
+    """Yield lists of users ordered by id, one page at a time."""
+    page_size = clamp_page_size(page_size)
+    last_id = None
+
+    while True:
+        query = client.table('users').select(EXPORT_COLUMNS)
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        result = query.order('id').limit(page_size).execute()
+
+        page = result.data
+        if not page:
+            return
+        yield page
+
+        if len(page) < page_size:
+            return
+        last_id = page[-1]['id']
+
+
+def iter_user_records(client, page_size=DEFAULT_PAGE_SIZE):
+    """Yield one export record per user, with its industry_ids attached."""
+    # user_industries is embedded in the users query, so each page is a
+    # single bounded request regardless of how many industries users have
+    for page in iter_user_pages(client, page_size):
+        for user in page:
+            industries = user.pop('user_industries', None) or []
+            user['industry_ids'] = [row['industry_id'] for row in industries]
+            yield user
+
+
+def iter_ndjson(client, page_size=DEFAULT_PAGE_SIZE, compress=False):
+    """Yield the export as NDJSON byte chunks, one chunk per page of users."""
+    page_size = clamp_page_size(page_size)
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 writes a gzip header
+    buffer = []
+
+    def flush():
+        chunk = ''.join(buffer).encode('utf-8')
+        buffer.clear()
+        return compressor.compress(chunk) if compressor else chunk
+
+    for count, record in enumerate(iter_user_records(client, page_size), 1):
+        buffer.append(json.dumps(record, separators=(',', ':'), default=str))
+        buffer.append('\n')
+        if count % page_size == 0:
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def main(argv=None):
+    # Only the CLI needs these; the app passes in its own client
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description='Export users as NDJSON')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f'Users per query (max {MAX_PAGE_SIZE})')
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    client = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_ROLE_KEY'))
+
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in iter_ndjson(client, clamp_page_size(args.page_size), compress=args.gzip):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()